@@ -8,28 +8,58 @@
 """
 import os
 import re
+import ctypes
 import sys
 import time
 import threading
 import queue
 import shutil
+import stat
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, List, Iterable, Dict
+from typing import Optional, Tuple, List, Iterable, Iterator, Dict
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 
+try:
+    import winreg  # 仅 Windows
+except ImportError:
+    winreg = None
+
 # --------------------------- 工具函数 ---------------------------
 
 KNOWN_EXTS = {'.zip', '.7z', '.rar', '.001', '.z01'}
+ARCHIVE_EXTS = tuple(KNOWN_EXTS)  # 供 str.endswith 一次性匹配
 
 # 目录名里常见的“解压密码：xxx”推断
 PWD_PREFIX_RE = re.compile(r'(解压码|解压密码|密码)(统一为|为|是)?\s*[：:\s]\s*(.+)')
 PWD_INLINE_RE = re.compile(r'(解压码|解压密码|压缩密码|提取码|密码|pw|pass|password|key)[：:\s=]*([^\s\]\\/:<>\"\'`]+)', re.I)
 PWD_BRACKET_RE = re.compile(r'[\[(（【]\s*(?:pwd|password|pass|密码|解压码|提取码)[：:\s=]*([^\]\)）】\s]+)', re.I)
 PWD_HINT_EXTS = {'.txt', '.md', '.nfo', '.url', '.ini'}
+PWD_HINT_SUFFIXES = tuple(PWD_HINT_EXTS)  # 供 str.endswith 一次性匹配
+HINT_READ_BYTES = 4096
+SNIFF_SUSPECT_BYTES = 1024 * 1024  # 压缩包扩展名的文件小于此值才识别文件头（网页/占位文件通常很小）
+
+# 分卷/扩展名相关正则（模块级预编译，扫描热路径上避免重复查缓存）
+PART_RAR_RE = re.compile(r'\.part\d+\.rar$')
+PART1_PREFIX_RE = re.compile(r'(.+?)\.part0*1\.rar$', re.I)
+MULTI001_RE = re.compile(r'\.(7z|zip)\.001$')
+EXT_CLEAN_RE = re.compile(r'[^0-9a-z]')
+# 分卷识别合并为一条；同一位置按书写顺序尝试，优先级与逐条判断一致
+MULTIPART_RE = re.compile(
+    r'(?P<part1>\.part0*1\.rar$)'
+    r'|(?P<partn>\.part\d+\.rar$)'
+    r'|(?P<sz001>\.(?:7z|zip)\.001$)'
+    r'|(?P<d001>\.001$)'        # 兜底按首卷处理
+    r'|(?P<z01>\.z01$)'
+    r'|(?P<zNN>\.z\d{2}$)', re.I)
+MULTIPART_FIRST_GROUPS = {'part1', 'sz001', 'd001', 'z01'}
 
 LANG_TEXT = {
     'zh': {
@@ -106,6 +136,12 @@ LANG_TEXT = {
     }
 }
 
+MAX_WORKERS = 16          # “并发”设置上限，也是常驻解压线程池的大小
+NESTED_MAX_DEPTH = 5      # 二次解压最多向下几层（防止自包含的压缩包无限展开）
+SNIFF_WORKERS = 16        # 扫描时并行读取文件头的线程数
+LOG_MAX_LINES = 5000      # 日志框最多保留的行数
+EVENT_DRAIN_MS = 50       # 日志与进度/阶段事件的刷新间隔（同类事件只取最新一条）
+
 MAGIC_SIGS = {
     'zip': [b'PK\x03\x04', b'PK\x05\x06', b'PK\x07\x08'],
     '7z':  [b'7z\xBC\xAF\x27\x1C'],  # 正确的 7z 文件头
@@ -115,6 +151,16 @@ MAGIC_SIGS = {
     'pdf': [b'%PDF'],
 }
 
+def _build_sig_index() -> Dict[int, List[Tuple[bytes, str]]]:
+    idx: Dict[int, List[Tuple[bytes, str]]] = {}
+    for kind, sigs in MAGIC_SIGS.items():
+        for sig in sigs:
+            idx.setdefault(sig[0], []).append((sig, kind))
+    return idx
+
+# 按首字节分桶的签名表：判定只需一次字典查找 + 1~2 次 startswith
+SIG_BY_FIRST_BYTE = _build_sig_index()
+
 def human(n: int) -> str:
     units = ['B','KB','MB','GB','TB']
     s = 0
@@ -123,13 +169,44 @@ def human(n: int) -> str:
         f /= 1024.0; s += 1
     return f'{f:.1f}{units[s]}'
 
-def file_size(path: Path) -> int:
-    try:
-        return path.stat().st_size
-    except Exception:
-        return 0
+# 注册表中的安装位置：(子键, 值名)；值为目录时拼上可执行文件名
+REG_INSTALL_KEYS = {
+    '7z.exe': [(r'SOFTWARE\7-Zip', 'Path64'), (r'SOFTWARE\7-Zip', 'Path')],
+}
+APP_PATHS_KEY = r'SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths'
+
+def _query_registry_install(subkey: str, value: str) -> Optional[str]:
+    if winreg is None:
+        return None
+    for hive in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+        try:
+            with winreg.OpenKey(hive, subkey) as k:
+                v, _ = winreg.QueryValueEx(k, value)
+        except OSError:
+            continue
+        if v:
+            return str(v).strip('" ')
+    return None
+
+def _find_in_registry(name: str) -> Optional[str]:
+    keys = [(f'{APP_PATHS_KEY}\\{name}', '')] + REG_INSTALL_KEYS.get(name.lower(), [])
+    for subkey, value in keys:
+        p = _query_registry_install(subkey, value)
+        if not p:
+            continue
+        if not p.lower().endswith('.exe'):
+            p = os.path.join(p, name)
+        if os.path.isfile(p):
+            return p
+    return None
 
-def find_on_path(names: Iterable[str]) -> Optional[str]:
+@lru_cache(maxsize=32)
+def find_on_path(names: Tuple[str, ...]) -> Optional[str]:
+    """查找解压程序：注册表 → PATH → 常见安装目录；结果缓存，names 需为元组。"""
+    for n in names:
+        p = _find_in_registry(n)
+        if p:
+            return p
     for n in names:
         p = shutil.which(n)
         if p:
@@ -144,49 +221,47 @@ def find_on_path(names: Iterable[str]) -> Optional[str]:
         rf'{program_files}\7-Zip\7z.exe',
         rf'{program_files_x86}\7-Zip\7z.exe',
     ]
+    wanted = {n.lower() for n in names}
     for c in candidates:
-        if os.path.isfile(c):
+        if os.path.basename(c).lower() in wanted and os.path.isfile(c):
             return c
     return None
 
-def normalize_extension(p: Path) -> Path:
-    if p.suffix.lower() in KNOWN_EXTS:
-        return p
-    ext = p.suffix.lower()
+def _guess_archive_ext(ext: str) -> Optional[str]:
+    """把被改写过的后缀（如 .r_a_r / .7zz）还原为标准压缩包后缀；无法识别返回 None。"""
     if not ext:
-        return p
-    cleaned = re.sub(r'[^0-9a-z]', '', ext)
-    target = None
+        return None
+    cleaned = EXT_CLEAN_RE.sub('', ext)
     if 'rar' in cleaned:
-        target = '.rar'
-    elif '7z' in cleaned:
-        target = '.7z'
-    elif 'zip' in cleaned:
-        target = '.zip'
+        return '.rar'
+    if '7z' in cleaned:
+        return '.7z'
+    if 'zip' in cleaned:
+        return '.zip'
+    return None
+
+def _normalize_path_str(path: str) -> str:
+    """扩展名不在已知列表中时按猜测结果改名：返回新路径，否则原样返回。"""
+    root, ext = os.path.splitext(path)
+    ext = ext.lower()
+    if ext in KNOWN_EXTS:
+        return path
+    target = _guess_archive_ext(ext)
     if target:
-        newp = p.with_suffix(target)
+        newp = root + target
         try:
-            p.rename(newp)
+            os.rename(path, newp)
             return newp
         except Exception:
-            return p
-    return p
-
-def is_multipart_first(archive: Path) -> Tuple[bool, bool]:
-    name = archive.name.lower()
-    if re.search(r'\.part0*1\.rar$', name) or re.search(r'\.part1\.rar$', name):
-        return True, True
-    if re.search(r'\.part\d+\.rar$', name):
-        return True, False
-    if name.endswith('.7z.001') or name.endswith('.zip.001'):
-        return True, True
-    if name.endswith('.001'):
-        return True, True  # 兜底按首卷处理
-    if name.endswith('.z01'):
-        return True, True
-    if re.search(r'\.z\d{2}$', name):
-        return True, False
-    return False, False
+            return path
+    return path
+
+def _multipart_flags(name: str) -> Tuple[bool, bool]:
+    """按小写文件名判断 (是否分卷, 是否首卷)；一次正则匹配，按命中的分组分派。"""
+    m = MULTIPART_RE.search(name)
+    if not m:
+        return False, False
+    return True, m.lastgroup in MULTIPART_FIRST_GROUPS
 
 def derive_password_from_dir(dirname: str) -> str:
     m = PWD_PREFIX_RE.search(dirname.strip())
@@ -197,6 +272,7 @@ def derive_password_from_dir(dirname: str) -> str:
 def _clean_pwd(pwd: str) -> str:
     return pwd.strip().strip('，。,:：;；)]}】）')
 
+@lru_cache(maxsize=4096)
 def _extract_pwd_from_text(text: str) -> Optional[str]:
     for pat in (PWD_PREFIX_RE, PWD_BRACKET_RE, PWD_INLINE_RE):
         m = pat.search(text)
@@ -206,7 +282,30 @@ def _extract_pwd_from_text(text: str) -> Optional[str]:
                 return _clean_pwd(val)
     return None
 
-def infer_password(arc: Path, cache: Dict[str, Optional[str]]= {}) -> Optional[str]:
+@lru_cache(maxsize=4096)
+def _scan_hint_dir(dir_key: str) -> Optional[str]:
+    """读取目录内的提示文件找密码；按规范化目录名缓存，同目录只扫一次。"""
+    # 直接迭代目录句柄：找到即返回并关闭，不必先把整个目录列完
+    try:
+        with os.scandir(dir_key) as it:
+            for e in it:
+                if not e.name.lower().endswith(PWD_HINT_SUFFIXES):
+                    continue
+                try:
+                    if not e.is_file(follow_symlinks=False):  # 用目录项自带的类型，不额外 stat
+                        continue
+                except OSError:
+                    continue
+                # 只读开头 4KB：一次 os.read，大文件也不会多读
+                content = _read_head(e.path, HINT_READ_BYTES).decode('utf-8', 'ignore')
+                pwd = _extract_pwd_from_text(content)
+                if pwd:
+                    return pwd
+    except OSError:
+        pass
+    return None
+
+def infer_password(arc: Path) -> Optional[str]:
     """多策略推断密码：文件名 -> 父目录名 -> 目录内提示文件。"""
     # 1) 文件名/无后缀名
     for blob in (arc.name, arc.stem):
@@ -217,125 +316,470 @@ def infer_password(arc: Path, cache: Dict[str, Optional[str]]= {}) -> Optional[s
     pwd = _extract_pwd_from_text(arc.parent.name)
     if pwd:
         return pwd
-    # 3) 目录提示文件（缓存避免重复读）
-    dir_key = str(arc.parent.resolve())
-    if dir_key in cache:
-        return cache[dir_key]
-    for f in arc.parent.iterdir():
-        if not f.is_file():
-            continue
-        if f.suffix.lower() not in PWD_HINT_EXTS:
-            continue
+    # 3) 目录提示文件（按目录缓存避免重复读；不做 resolve 以省去系统调用）
+    return _scan_hint_dir(os.path.normcase(os.path.abspath(arc.parent)))
+
+@lru_cache(maxsize=100_000)
+def _infer_pwd_cached(path_str: str, mtime_ns: int, size: int) -> Optional[str]:
+    """按 (路径, mtime, 大小) 缓存的 infer_password；文件未变动时直接取缓存。"""
+    return infer_password(Path(path_str))
+
+def _is_reparse_dir(entry: os.DirEntry) -> bool:
+    """符号链接、Windows 联接点等重解析点目录不进入，避免环路。"""
+    if entry.is_symlink():
+        return True
+    if os.name == 'nt':
         try:
-            if f.stat().st_size > 64 * 1024:  # 避免大文件
-                continue
-            content = f.read_text('utf-8', errors='ignore')[:4000]
-        except Exception:
+            attrs = entry.stat(follow_symlinks=False).st_file_attributes
+        except OSError:
+            return True
+        return bool(attrs & stat.FILE_ATTRIBUTE_REPARSE_POINT)
+    return False
+
+def _scan_one_dir(path: str, recursive: bool = True) -> Tuple[List[os.DirEntry], List[str]]:
+    """列出单个目录：返回 (文件条目, 需继续进入的子目录)。"""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return [], []
+    files, subdirs = [], []
+    for e in entries:
+        try:
+            if e.is_dir():
+                if recursive and not _is_reparse_dir(e):
+                    subdirs.append(e.path)
+            elif e.is_file():
+                files.append(e)
+        except OSError:
             continue
-        pwd = _extract_pwd_from_text(content)
-        if pwd:
-            cache[dir_key] = pwd
-            return pwd
-    cache[dir_key] = None
-    return None
+    return files, subdirs
 
-def gather_archives(root: Path, recursive: bool=True) -> List[Path]:
-    found = []
-    if recursive:
-        walker = os.walk(root)
+def _iter_scandir(root, recursive: bool = True) -> Iterator[os.DirEntry]:
+    """显式栈 + os.scandir 遍历，仅产出文件条目；顺序与 os.walk 自顶向下一致。"""
+    stack = [os.fspath(root)]
+    while stack:
+        files, subdirs = _scan_one_dir(stack.pop(), recursive)
+        yield from files
+        stack.extend(reversed(subdirs))
+
+class _ParallelWalker:
+    """
+    多线程目录遍历：每个目录作为一个任务放入队列，工作线程 scandir 后把子目录放回队列。
+    适合 SMB/NAS、机械盘等元数据往返延迟高的场景；结果按目录先序重排，顺序与串行一致。
+    """
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+
+    def walk(self, root, want=None) -> List[os.DirEntry]:
+        tasks = queue.Queue()
+        lock = threading.Lock()
+        results = []  # (目录先序键, 文件条目)
+        tasks.put(((), os.fspath(root)))
+
+        def worker():
+            while True:
+                item = tasks.get()
+                if item is None:
+                    tasks.task_done()
+                    return
+                try:
+                    key, path = item
+                    files, subdirs = _scan_one_dir(path)
+                    if want is not None:
+                        files = [e for e in files if want(e.name)]
+                    with lock:
+                        results.append((key, files))
+                    for i, d in enumerate(subdirs):
+                        tasks.put((key + (i,), d))
+                finally:
+                    tasks.task_done()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan") as ex:
+            for _ in range(self.workers):
+                ex.submit(worker)
+            tasks.join()
+            for _ in range(self.workers):
+                tasks.put(None)
+        results.sort(key=lambda r: r[0])
+        return [e for _, files in results for e in files]
+
+def _is_archive_candidate(name: str) -> bool:
+    """仅凭文件名判断是否可能是压缩包（含待修正后缀），不触碰文件系统。"""
+    low = name.lower()
+    if low.endswith(ARCHIVE_EXTS) or PART_RAR_RE.search(low):
+        return True
+    return _guess_archive_ext(os.path.splitext(low)[1]) is not None
+
+def _accepted_archive_path(e: os.DirEntry) -> Optional[str]:
+    """候选目录项 → 最终路径（必要时修正后缀）；非首卷分卷或改名失败返回 None。"""
+    path = e.path
+    low = e.name.lower()
+    if not (low.endswith(ARCHIVE_EXTS) or PART_RAR_RE.search(low)):
+        path = _normalize_path_str(path)
+        if path == e.path:
+            return None  # 改名失败
+        low = os.path.basename(path).lower()
+    is_multi, is_first = _multipart_flags(low)
+    if is_multi and not is_first:
+        return None
+    return path
+
+def _iter_archive_entries(root) -> Iterator[os.DirEntry]:
+    """递归产出文件名像压缩包的目录项（不跟随链接）；只用 entry.name 判断，不构造 Path。"""
+    for e in _iter_scandir(root):
+        if _is_archive_candidate(e.name):
+            yield e
+
+def _iter_accepted(root: Path, recursive: bool, workers: int) -> Iterator[Tuple[str, os.DirEntry]]:
+    """产出 (规范化后路径, 目录项)，分卷仅保留首卷；workers > 1 且递归时并行遍历目录。"""
+    if recursive and workers > 1:
+        entries = _ParallelWalker(workers).walk(root, _is_archive_candidate)
     else:
-        walker = [(root, [], [f for f in os.listdir(root) if (root/f).is_file()])]
-    for dirpath, _, files in walker:
-        for f in files:
-            p = Path(dirpath) / f
-            p = normalize_extension(p)
-            low = p.name.lower()
-            if any([low.endswith('.zip'), low.endswith('.7z'), low.endswith('.rar'),
-                    low.endswith('.001'), low.endswith('.z01'),
-                    re.search(r'\.part\d+\.rar$', low) is not None]):
-                is_multi, is_first = is_multipart_first(p)
-                if is_multi and not is_first:
-                    continue
-                found.append(p)
+        entries = (e for e in _iter_scandir(root, recursive) if _is_archive_candidate(e.name))
+    for e in entries:
+        # 全程用字符串判断，确认收录后才构造 Path
+        path = _accepted_archive_path(e)
+        if path is not None:
+            yield path, e
+
+def gather_archives_stat(root: Path, recursive: bool=True,
+                         workers: int = 1) -> List[Tuple[Path, Optional[os.stat_result]]]:
+    """扫描压缩包（分卷仅保留首卷），附带 stat 结果（取自目录项，免去二次 stat；失败为 None）。"""
+    found = []
+    for path, e in _iter_accepted(root, recursive, workers):
+        # 改过名的目录项已失效，才单独 stat
+        try:
+            st = e.stat() if path == e.path else os.stat(path)
+        except OSError:
+            st = None
+        found.append((Path(path), st))
     return found
 
-def sniff_signature(path: Path, read_len: int = 8) -> str:
-    try:
-        with open(path, 'rb') as f:
-            head = f.read(read_len)
-    except Exception:
+def _classify_head(head: bytes) -> str:
+    if not head:
         return 'unknown'
-    for kind, sigs in MAGIC_SIGS.items():
-        for sig in sigs:
-            if head.startswith(sig):
-                return kind
+    for sig, kind in SIG_BY_FIRST_BYTE.get(head[0], ()):
+        if head.startswith(sig):
+            return kind
     return 'unknown'
 
+def _read_head(path, read_len: int) -> bytes:
+    # 直接用 os.open/os.read，省去 Python 缓冲文件对象的开销
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError:
+        return b''
+    try:
+        return os.read(fd, read_len)
+    except OSError:
+        return b''
+    finally:
+        os.close(fd)
+
+def sniff_signature(path: Path, read_len: int = 8) -> str:
+    return _classify_head(_read_head(path, read_len))
+
+def sniff_many(paths: Iterable, read_len: int = 8) -> List[str]:
+    """批量识别文件头。"""
+    return [_classify_head(_read_head(p, read_len)) for p in paths]
+
+@lru_cache(maxsize=100_000)
+def _sniff_cached(path_str: str, mtime_ns: int, size: int) -> str:
+    """按 (路径, mtime, 大小) 缓存的 sniff_signature；文件内容变动后键随之改变。"""
+    return sniff_signature(path_str)
+
+def _build_scan_row(p: Path, key: Tuple[str, int, int]) -> Dict:
+    """生成扫描列表的一行（可在工作线程中调用，不触碰界面）。"""
+    szb = key[2]
+    row = {
+        'path': p, 'name': p.name, 'sizeb': szb, 'sizes': human(szb),
+        'type': _sniff_cached(*key), 'dir': str(p.parent), 'stem': p.stem,
+        'pwd': _infer_pwd_cached(*key) or "", 'checked': False, 'fav': False
+    }
+    row['_blob'] = _filter_blob(row)
+    return row
+
+def _filter_blob(row: Dict) -> str:
+    """关键字过滤匹配的文本（小写）；扫描时算好，密码修改后重算。"""
+    return f"{row['name']} {row['dir']} {row['pwd']}".lower()
+
+def _root_key(root) -> str:
+    """扫描根目录的比较键（大小写按平台规范化、去掉末尾分隔符）；每次运行算一次。"""
+    return os.path.normcase(os.fspath(root)).rstrip(os.sep)
+
+def _rel_parent(parent: str, root: Optional[str]) -> str:
+    """
+    parent 相对扫描根的路径（root 取 _root_key 的结果）；
+    root 为 None、parent 不在 root 之下或就是 root 时返回 ''。只做字符串前缀比较。
+    """
+    if root is None:
+        return ''
+    prefix = root + os.sep
+    if os.path.normcase(parent).startswith(prefix):
+        return parent[len(prefix):]
+    return ''
+
+def _archive_out_dir(parent: str, stem: str, root: Optional[str], out_base: Optional[Path]) -> Path:
+    """解压输出目录：未指定输出根目录时放在压缩包旁；否则在输出根目录下保留相对扫描根的层级。"""
+    if out_base is None:
+        return Path(parent, stem)
+    rel = _rel_parent(parent, root)
+    return out_base / rel / stem if rel else out_base / stem
+
 def overwrite_flag(policy: str) -> str:
     return {'skip': '-aos', 'rename': '-aou', 'overwrite': '-aoa'}[policy]
 
-def bandizip_cmd(bz: str, archive: Path, outdir: Path, password: Optional[str], policy: str) -> list:
-    cmd = [bz, 'x', f'-cp:65001', overwrite_flag(policy), f'-o:{str(outdir)}']
-    if password:
-        cmd.insert(2, f'-p:{password}')
-    cmd.append(str(archive))
+@dataclass
+class ArchiveJob:
+    """单个压缩包的解压任务；路径字符串与 -o 参数只算一次，测试/解压/切换重试时复用。"""
+    path: Path
+    outdir: Path
+    pwd: Optional[str] = None
+    path_str: str = field(init=False)
+    outdir_str: str = field(init=False)
+    bz_out_flag: str = field(init=False)
+    sz_out_flag: str = field(init=False)
+
+    def __post_init__(self):
+        self.path_str = str(self.path)
+        self.outdir_str = str(self.outdir)
+        self.bz_out_flag = f'-o:{self.outdir_str}'
+        self.sz_out_flag = f'-o{self.outdir_str}'
+
+# 一次运行内不变的设置：开始前在主线程读取一次，逐个压缩包复用；
+# slots 为本次运行共用的并发名额，顶层与二次解压的进程合计不超过 workers
+RunConfig = namedtuple('RunConfig', 'out_base policy quiet nested delete cross_try pretest first second workers recursive slots')
+
+def bandizip_cmd(bz: str, job: ArchiveJob, policy: str) -> list:
+    cmd = [bz, 'x', f'-cp:65001', overwrite_flag(policy), job.bz_out_flag]
+    if job.pwd:
+        cmd.insert(2, f'-p:{job.pwd}')
+    cmd.append(job.path_str)
     return cmd
 
-def bandizip_test_cmd(bz: str, archive: Path, password: Optional[str]) -> list:
+def bandizip_test_cmd(bz: str, job: ArchiveJob) -> list:
     cmd = [bz, 't']
-    if password:
-        cmd.append(f'-p:{password}')
-    cmd.append(str(archive))
+    if job.pwd:
+        cmd.append(f'-p:{job.pwd}')
+    cmd.append(job.path_str)
     return cmd
 
-def sevenzip_cmd(sz: str, archive: Path, outdir: Path, password: Optional[str], policy: str) -> list:
+def sevenzip_cmd(sz: str, job: ArchiveJob, policy: str) -> list:
     # 传入空密码以禁止 7z 交互式等待
-    pwd = '' if password is None else password
-    cmd = [sz, 'x', f'-o{str(outdir)}', overwrite_flag(policy), f'-p{pwd}', '-y']
-    cmd.append(str(archive))
-    return cmd
+    pwd = '' if job.pwd is None else job.pwd
+    return [sz, 'x', job.sz_out_flag, overwrite_flag(policy), f'-p{pwd}', '-y', job.path_str]
 
-def sevenzip_test_cmd(sz: str, archive: Path, password: Optional[str]) -> list:
+def sevenzip_test_cmd(sz: str, job: ArchiveJob) -> list:
     # 传入空密码以禁止 7z 交互式等待
-    pwd = '' if password is None else password
-    cmd = [sz, 't', f'-p{pwd}', '-y']
-    cmd.append(str(archive))
-    return cmd
+    pwd = '' if job.pwd is None else job.pwd
+    return [sz, 't', f'-p{pwd}', '-y', job.path_str]
+
+@lru_cache(maxsize=1024)
+def _dir_names(dir_str: str, mtime_ns: int) -> Tuple[str, ...]:
+    """目录下的文件名；以目录 mtime 作缓存键，删除/新建文件后键随之改变，自动失效。"""
+    with os.scandir(dir_str) as it:
+        return tuple(e.name for e in it)
 
 def get_all_multipart_siblings(first_part: Path) -> list:
+    # 用 os.scandir + 字符串前后缀判断代替 glob：少分配 Path，文件名里的 [ ] 也不会被当成通配符
     name = first_part.name
-    parent = first_part.parent
-    siblings = []
-    if name.lower().endswith('.7z.001') or name.lower().endswith('.zip.001'):
-        stem = name[:-4]
-        for p in parent.glob(stem + '.*'):
-            if re.match(r'.*\.(\d{3})$', p.name.lower()):
-                siblings.append(p)
-    elif name.lower().endswith('.z01'):
-        base = name[:-3]
-        for p in parent.glob(base + 'z*'):
-            siblings.append(p)
+    low = name.lower()
+    prefix = None
+    match = None  # 前缀之外对文件名的附加判断
+    if MULTI001_RE.search(low):
+        prefix = name[:-4] + '.'
+        match = lambda n: n[-4] == '.' and n[-3:].isdigit()
+    elif low.endswith('.z01'):
+        prefix = name[:-3] + 'z'
     else:
-        m = re.match(r'(.+?)\.part0*1\.rar$', name, flags=re.I) or re.match(r'(.+?)\.part1\.rar$', name, flags=re.I)
+        m = PART1_PREFIX_RE.match(name)
         if m:
-            prefix = m.group(1)
-            for p in parent.glob(prefix + '.part*.rar'):
-                siblings.append(p)
+            prefix = m.group(1) + '.part'
+            match = lambda n: n.endswith('.rar')
+    siblings = []
+    if prefix is not None:
+        norm = os.path.normcase  # Windows 下与 glob 一样不区分大小写
+        prefix = norm(prefix)
+        parent = os.fspath(first_part.parent)
+        # 同一目录的多个压缩包共用一次目录列表
+        try:
+            names = _dir_names(parent, os.stat(parent).st_mtime_ns)
+        except OSError:
+            names = ()
+        for fn in names:
+            n = norm(fn)
+            if n.startswith(prefix) and (match is None or match(n)):
+                siblings.append(Path(os.path.join(parent, fn)))
     if first_part not in siblings:
         siblings.append(first_part)
     return siblings
 
-def dir_size_bytes(path: Path) -> int:
-    total = 0
-    if not path.exists():
-        return 0
-    for dp, _, files in os.walk(path):
-        for f in files:
+def _sendfile_copy(src: str, dst: str):
+    # 内核内拷贝，数据不经过 Python 缓冲区
+    fin = os.open(src, os.O_RDONLY)
+    try:
+        size = os.fstat(fin).st_size
+        fout = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(fout, fin, offset, min(size - offset, 1 << 30))
+                if sent == 0:
+                    break
+                offset += sent
+        finally:
+            os.close(fout)
+    finally:
+        os.close(fin)
+
+def _fast_copy(src, dst):
+    """复制文件及元数据：Windows 用 CopyFileExW，Linux 用 sendfile；快速路径失败或其他平台回退 shutil.copy2。"""
+    src, dst = os.fspath(src), os.fspath(dst)
+    try:
+        if sys.platform == 'win32':
+            k32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            if not k32.CopyFileExW(src, dst, None, None, None, 0):
+                raise ctypes.WinError(ctypes.get_last_error())
+        elif sys.platform.startswith('linux'):
+            _sendfile_copy(src, dst)
+        else:
+            shutil.copy2(src, dst)
+            return
+    except OSError:
+        shutil.copy2(src, dst)
+        return
+    shutil.copystat(src, dst)
+
+class DirSizeTracker:
+    """
+    增量统计目录大小（供解压监控轮询）：
+    - 缓存每个目录的 mtime、文件大小、子目录与合计；mtime 未变的目录不再 scandir；
+    - 目录未变时只复查“活跃”文件：新出现的、或最近 HOT_POLLS 轮内大小变过的文件；
+    - 每 FULL_RESCAN_POLLS 轮忽略缓存全量重扫一次：暂停后继续写入的文件、
+      FAT/exFAT 等 mtime 精度粗的文件系统上同一刻新建的文件都靠这一轮补上。
+    平时每轮的开销为 O(目录数 + 活跃文件数)。
+    """
+    HOT_POLLS = 3
+    FULL_RESCAN_POLLS = 5
+
+    def __init__(self, path: Path):
+        self.root = os.fspath(path)
+        self.dirs: Dict[str, list] = {}  # 目录 -> [mtime_ns, {文件: 大小}, [子目录], 文件大小合计]
+        self.hot: Dict[str, int] = {}    # 活跃文件 -> 剩余复查轮数
+        self.files = 0
+        self.polls = 0
+
+    def poll(self, full: bool = False) -> int:
+        """返回当前总大小；full=True 时强制全量重扫。"""
+        total = 0
+        files_cnt = 0
+        full = full or self.polls % self.FULL_RESCAN_POLLS == 0
+        self.polls += 1
+        checked, changed = set(), set()
+        visited = set()
+        stack = [self.root]
+        while stack:
+            d = stack.pop()
             try:
-                total += (Path(dp)/f).stat().st_size
-            except Exception:
-                pass
-    return total
+                mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            visited.add(d)
+            cached = self.dirs.get(d)
+            if cached and cached[0] == mtime and not full:
+                sizes = cached[1]
+                for fp in self.hot.keys() & sizes.keys():
+                    checked.add(fp)
+                    try:
+                        sz = os.stat(fp).st_size
+                    except OSError:
+                        continue
+                    old = sizes[fp]
+                    if sz != old:
+                        sizes[fp] = sz
+                        cached[3] += sz - old
+                        changed.add(fp)
+            else:
+                old_sizes = cached[1] if cached else {}
+                sizes, subdirs = {}, []
+                try:
+                    with os.scandir(d) as it:
+                        for e in it:
+                            try:
+                                if e.is_dir(follow_symlinks=False):
+                                    subdirs.append(e.path)
+                                else:
+                                    sz = e.stat(follow_symlinks=False).st_size
+                                    sizes[e.path] = sz
+                                    checked.add(e.path)
+                                    if old_sizes.get(e.path) != sz:
+                                        changed.add(e.path)
+                            except OSError:
+                                pass
+                except OSError:
+                    pass
+                cached = self.dirs[d] = [mtime, sizes, subdirs, sum(sizes.values())]
+            total += cached[3]
+            files_cnt += len(cached[1])
+            stack.extend(cached[2])
+        for d in self.dirs.keys() - visited:
+            del self.dirs[d]
+        # 复查后未变的活跃文件减一轮，归零即移出；本轮没查到（已消失）的一并移出
+        for fp in list(self.hot):
+            left = self.hot[fp] - 1 if fp in checked else 0
+            if left > 0:
+                self.hot[fp] = left
+            else:
+                del self.hot[fp]
+        for fp in changed:
+            self.hot[fp] = self.HOT_POLLS
+        self.files = files_cnt
+        return total
+
+def _monitor_interval(size: int, files: int) -> float:
+    """目录越大，轮询越稀疏：2s → 5s → 10s。"""
+    if size > 10 * 1024**3 or files > 100_000:
+        return 10.0
+    if size > 1024**3 or files > 10_000:
+        return 5.0
+    return 2.0
+
+OUTPUT_CHUNK = 64 * 1024  # 子进程输出每次读取的字节数
+
+def _pump_output(stream, log, on_activity=None):
+    """
+    按块读取子进程输出（字节）：一次切出整块中的完整行，整批解码后一次写日志；
+    不完整的末行（含结尾单独的 CR）留到下一块拼接。
+    """
+    tail = b''
+    while True:
+        try:
+            chunk = stream.read1(OUTPUT_CHUNK)
+        except (OSError, ValueError):
+            break
+        if not chunk:
+            break
+        if on_activity is not None:
+            on_activity()
+        parts = (tail + chunk).splitlines(keepends=True)
+        tail = b'' if parts[-1].endswith(b'\n') else parts.pop()
+        if len(tail) > OUTPUT_CHUNK:  # 长时间无换行，直接输出
+            parts.append(tail)
+            tail = b''
+        if parts:
+            log(b'\n'.join(l.rstrip(b'\r\n') for l in parts).decode('utf-8', 'ignore'))
+    if tail:
+        log(tail.rstrip(b'\r\n').decode('utf-8', 'ignore'))
+
+def _no_window_kwargs() -> dict:
+    """Windows 下隐藏子进程控制台窗口，省去 conhost 的创建与窗口闪烁。"""
+    if sys.platform != 'win32':
+        return {}
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    si.wShowWindow = 0  # SW_HIDE
+    return {'creationflags': subprocess.CREATE_NO_WINDOW, 'startupinfo': si}
 
 def run_cmd(cmd: list, log, stop_flag: threading.Event,
             monitor_dir: Optional[Path] = None, quiet_limit: int = 30, phase_name: str = '') -> int:
@@ -348,26 +792,37 @@ def run_cmd(cmd: list, log, stop_flag: threading.Event,
     last_activity = time.time()
     try:
         p = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            text=True, encoding='utf-8', errors='ignore'
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=OUTPUT_CHUNK,
+            **_no_window_kwargs()
         )
         mon_stop = threading.Event()
 
+        def touch():
+            nonlocal last_activity
+            last_activity = time.time()
+
         def monitor():
             last_sz = -1
+            logged_sz = -1
+            interval = 2.0
+            tracker = DirSizeTracker(monitor_dir) if monitor_dir is not None else None
             nonlocal last_activity
             while not mon_stop.is_set():
                 if p.poll() is not None:
                     break
                 now = time.time()
-                # 目录尺寸变化监控
-                if monitor_dir is not None:
+                # 目录尺寸变化监控（增量统计；变化 ≥1MB 或 ≥5% 才写日志）
+                if tracker is not None:
                     try:
-                        sz = dir_size_bytes(monitor_dir)
+                        sz = tracker.poll()
                         if sz != last_sz:
-                            log(f"  · 目标目录大小 {human(sz)}")
                             last_sz = sz
                             last_activity = now
+                            delta = abs(sz - logged_sz)
+                            if logged_sz < 0 or delta >= 1024 * 1024 or delta >= logged_sz * 0.05:
+                                log(f"  · 目标目录大小 {human(sz)}")
+                                logged_sz = sz
+                        interval = _monitor_interval(sz, tracker.files)
                     except Exception:
                         pass
                 # 心跳（无论是否有 monitor_dir）
@@ -375,21 +830,30 @@ def run_cmd(cmd: list, log, stop_flag: threading.Event,
                     tag = f"（阶段：{phase_name}）" if phase_name else ""
                     log(f"  … {quiet_limit}s 未见输出{tag}，仍在等待子进程完成")
                     last_activity = now
-                time.sleep(2)
+                # 用事件等待代替 sleep：子进程结束或停止时立即返回
+                if mon_stop.wait(interval):
+                    break
+            # 子进程结束后全量统计一次：最后一点变化可能因节流没写日志
+            if tracker is not None and p.poll() is not None:
+                try:
+                    sz = tracker.poll(full=True)
+                    if sz != logged_sz:
+                        log(f"  · 目标目录大小 {human(sz)}")
+                except Exception:
+                    pass
 
         t_mon = threading.Thread(target=monitor, daemon=True)
         t_mon.start()
 
-        while True:
+        # 输出由独立线程读取，读阻塞时本线程仍能及时响应停止
+        t_out = threading.Thread(target=_pump_output, args=(p.stdout, log, touch), daemon=True)
+        t_out.start()
+        while t_out.is_alive():
             if stop_flag.is_set():
                 p.terminate()
                 mon_stop.set()
                 return -1
-            line = p.stdout.readline()
-            if not line:
-                break
-            last_activity = time.time()
-            log(line.rstrip('\n'))
+            t_out.join(timeout=0.2)
         p.wait()
         mon_stop.set()
         t_mon.join(timeout=5)
@@ -402,6 +866,17 @@ def run_cmd(cmd: list, log, stop_flag: threading.Event,
 
 # --------------------------- GUI 应用 ---------------------------
 
+# 列表页各列的排序键（作用于行 dict）
+SORT_KEYS = {
+    'sel': lambda r: bool(r.get('checked')),
+    'fav': lambda r: bool(r.get('fav')),
+    'name': lambda r: r['name'].lower(),
+    'size': lambda r: r.get('sizeb', 0),
+    'type': lambda r: r['type'].lower(),
+    'dir': lambda r: r['dir'].lower(),
+    'pwd': lambda r: r['pwd'].lower(),
+}
+
 class AutoExtractorApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -409,7 +884,11 @@ class AutoExtractorApp(tk.Tk):
         self.geometry("1150x820")
         self.minsize(1020, 720)
 
-        self.queue = queue.Queue()
+        # 日志缓冲：超过 LOG_MAX_LINES 的旧行在缓冲里就丢弃，界面卡顿时也不会无限增长
+        self.log_buf = deque(maxlen=LOG_MAX_LINES)
+        self.log_lock = threading.Lock()
+        self._mkdir_cache: set = set()  # 本次运行已创建过的输出目录，跳过重复 mkdir
+        self.event_q = queue.Queue()  # 工作线程的进度/阶段事件，由 _drain_events 合并后更新界面
         self.stop_flag = threading.Event()
         self.worker: Optional[threading.Thread] = None
 
@@ -417,8 +896,8 @@ class AutoExtractorApp(tk.Tk):
         self.lang = tk.StringVar(value='zh')
         self.var_root = tk.StringVar()
         self.var_out = tk.StringVar()
-        self.var_bz = tk.StringVar(value=find_on_path(['bz.exe']) or '')
-        self.var_7z = tk.StringVar(value=find_on_path(['7z.exe']) or '')
+        self.var_bz = tk.StringVar(value=find_on_path(('bz.exe',)) or '')
+        self.var_7z = tk.StringVar(value=find_on_path(('7z.exe',)) or '')
         self.var_recursive = tk.BooleanVar(value=True)
         self.var_delete = tk.BooleanVar(value=False)
         self.var_nested = tk.BooleanVar(value=True)
@@ -434,14 +913,23 @@ class AutoExtractorApp(tk.Tk):
         self.var_size_min = tk.StringVar()
         self.var_size_max = tk.StringVar()
         self.var_workers = tk.IntVar(value=3)
-        self.scan_rows: List[Dict] = []
-        self.bytes_map: Dict[str, int] = {}
-        self.checked_map: Dict[str, bool] = {}
-        self.favorite_map: Dict[str, bool] = {}
+        self.rows_by_iid: Dict[str, Dict] = {}  # iid(路径字符串) -> 行；按扫描顺序保存，唯一数据源
+        self.values_map: Dict[str, list] = {}  # iid -> 表格当前 values，改单元格时免去回读
+        self.detached_iids: set = set()  # 被过滤隐藏（detach）的行
+        self.selected_iids: set = set()  # 表格当前选中行，由 <<TreeviewSelect>> 同步
         self.sort_state = {'col': 'name', 'desc': False}
+        self._current_lang: Optional[str] = None
+        self._lang_text = LANG_TEXT['zh']
+
+        # 常驻解压线程池：每次运行的并发数由信号量控制，不再反复创建线程池
+        self._extract_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="extract")
 
         self._build_ui()
-        self.after(100, self._drain_queue)
+        self.after(EVENT_DRAIN_MS, self._drain_events)
+
+    def destroy(self):
+        self._extract_pool.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
 
     def _build_ui(self):
         # 顶部设置（两个模式公用）
@@ -526,7 +1014,7 @@ class AutoExtractorApp(tk.Tk):
         self.btn_apply_filter = ttk.Button(t2_top, text="应用过滤", command=self.apply_filter); self.btn_apply_filter.pack(side='left', padx=4)
         self.btn_export = ttk.Button(t2_top, text="导出列表", command=self.export_scan_list); self.btn_export.pack(side='left', padx=(10,4))
         self.lbl_workers = ttk.Label(t2_top, text="并发："); self.lbl_workers.pack(side='left', padx=(16,4))
-        ttk.Spinbox(t2_top, from_=1, to=16, textvariable=self.var_workers, width=4).pack(side='left')
+        ttk.Spinbox(t2_top, from_=1, to=MAX_WORKERS, textvariable=self.var_workers, width=4).pack(side='left')
         self.btn_extract_sel = ttk.Button(t2_top, text="解压选中", command=self.on_extract_selected); self.btn_extract_sel.pack(side='left', padx=8)
         self.btn_select_all = ttk.Button(t2_top, text="全选", command=lambda: self._t2_select_all(True)); self.btn_select_all.pack(side='left', padx=6)
         self.btn_select_none = ttk.Button(t2_top, text="全不选", command=lambda: self._t2_select_all(False)); self.btn_select_none.pack(side='left', padx=6)
@@ -552,6 +1040,7 @@ class AutoExtractorApp(tk.Tk):
         self.tree.bind("<Button-3>", self._on_tree_right_click)
         self.tree.bind("<Double-1>", self._on_tree_double_click)
         self.tree.bind("<Control-c>", self._copy_selected_cell)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
         self.ctx_iid = None
         self.last_cell = {'iid': None, 'col': None}
 
@@ -619,20 +1108,44 @@ class AutoExtractorApp(tk.Tk):
             var.set(p)
 
     def post(self, msg: str):
-        self.queue.put(msg)
-
-    def log(self, msg: str):
-        self.txt.insert('end', msg + '\n'); self.txt.see('end')
-
-    def _drain_queue(self):
+        with self.log_lock:
+            self.log_buf.append(msg)
+
+    def _append_log(self, msgs: List[str]):
+        # 一次 insert 写入整批；超出上限裁掉最早的行；用户上翻查看时不强制滚到底
+        follow = self.txt.yview()[1] >= 1.0
+        self.txt.insert('end', '\n'.join(msgs) + '\n')
+        lines = int(self.txt.index('end-1c').split('.')[0]) - 1
+        if lines > LOG_MAX_LINES:
+            self.txt.delete('1.0', f'{lines - LOG_MAX_LINES + 1}.0')
+        if follow:
+            self.txt.see('end')
+
+    def emit(self, kind: str, *args):
+        """工作线程上报界面事件：init / now / progress / phase。"""
+        self.event_q.put((kind, args))
+
+    def _drain_events(self):
+        with self.log_lock:
+            msgs = list(self.log_buf)
+            self.log_buf.clear()
+        if msgs:
+            self._append_log(msgs)
+        latest = {}
         while True:
             try:
-                m = self.queue.get_nowait()
+                kind, args = self.event_q.get_nowait()
             except queue.Empty:
                 break
-            else:
-                self.log(m)
-        self.after(100, self._drain_queue)
+            latest[kind] = args
+        if latest:
+            # 同类只应用最新一条；init 先于 progress，保证新一轮的最大值已设置
+            for kind, handler in (('init', self._init_progress), ('now', self._set_now),
+                                  ('progress', self._update_progress), ('phase', self._set_phase)):
+                args = latest.get(kind)
+                if args is not None:
+                    handler(*args)
+        self.after(EVENT_DRAIN_MS, self._drain_events)
 
     def _update_progress(self, done: int, total: int):
         self.progress['value'] = done
@@ -648,8 +1161,12 @@ class AutoExtractorApp(tk.Tk):
         self.lbl_phase.config(text=f"阶段：-")
 
     def _apply_lang(self, *args):
+        # trace 与单选按钮 command 都会触发；语言未变则不重建界面文字
         lang = self.lang.get()
-        t = LANG_TEXT.get(lang, LANG_TEXT['zh'])
+        if lang == self._current_lang:
+            return
+        self._current_lang = lang
+        t = self._lang_text = LANG_TEXT.get(lang, LANG_TEXT['zh'])
         self.title(t['title'])
         try:
             self.frm_top.configure(text=t['frame_basic'])
@@ -682,16 +1199,25 @@ class AutoExtractorApp(tk.Tk):
             self.btn_select_none.configure(text=t['select_none'])
         if hasattr(self, 't1_info'):
             self.t1_info.configure(text=t['scan_desc'])
-        try:
-            self.lbl_t2_count.config(text=f"{t['listed']}{len(self.scan_rows)}")
-        except Exception:
-            pass
+        if hasattr(self, 'lbl_t2_count'):
+            self._refresh_list_count()
         if hasattr(self, 'help_text'):
             self.help_text.configure(state='normal')
             self.help_text.delete('1.0', 'end')
             self.help_text.insert('end', t['help_body'])
             self.help_text.configure(state='disabled')
 
+    def _scan_workers(self) -> int:
+        """目录遍历并发数，复用“并发”设置。"""
+        try:
+            return max(1, min(int(self.var_workers.get() or 1), MAX_WORKERS))
+        except (tk.TclError, ValueError):
+            return 1
+
+    def _refresh_list_count(self, shown: Optional[int] = None, tag: str = ''):
+        n = len(self.rows_by_iid) if shown is None else shown
+        self.lbl_t2_count.config(text=f"{self._lang_text['listed']}{n}{tag}")
+
     def _init_progress(self, total: int):
         self.progress['maximum'] = max(total, 1)
         self.lbl_stat.config(text=f"已处理：0 / {total}")
@@ -712,12 +1238,14 @@ class AutoExtractorApp(tk.Tk):
             messagebox.showerror("错误", "请先选择有效的扫描根目录")
             return
         self.stop_flag.clear()
+        self._mkdir_cache.clear()
         self.btn_start1.configure(state='disabled')
         self.btn_stop1.configure(state='normal')
         self.txt.delete('1.0', 'end')
         self.progress['value'] = 0
         self.lbl_stat.config(text="准备中...")
-        self.worker = threading.Thread(target=self._work_full, args=(root,), daemon=True)
+        cfg = self._run_config()
+        self.worker = threading.Thread(target=self._work_full, args=(root, cfg), daemon=True)
         self.worker.start()
 
     def on_stop(self):
@@ -725,52 +1253,37 @@ class AutoExtractorApp(tk.Tk):
         self.post("请求停止，正在结束当前任务...")
         self.btn_stop1.configure(state='disabled')
 
-    def _work_full(self, root: Path):
+    def _work_full(self, root: Path, cfg: RunConfig):
         try:
-            archives = gather_archives(root, self.var_recursive.get())
+            archives = gather_archives_stat(root, cfg.recursive, workers=cfg.workers)
             total = len(archives); done = 0
             self.post(f"发现压缩包：{total} 个")
-            self.after(0, self._init_progress, total)
+            self.emit('init', total)
+
+            root_str = _root_key(root)
 
-            for idx, arc in enumerate(archives, 1):
+            for idx, (arc, st) in enumerate(archives, 1):
                 if self.stop_flag.is_set():
                     break
                 # 进度标签 + 开始日志
-                self.after(0, self._set_now, idx, total, arc)
-                self.after(0, self._set_phase, "准备")
+                self.emit('now', idx, total, arc)
+                self.emit('phase', "准备")
                 self.post(f"== 开始：[{idx}/{total}] {arc}")
-                self._handle_one_archive(arc, root)
-                done += 1; self.after(0, self._update_progress, done, total)
-                self.after(0, self._set_phase, "完成")
+                out_dir = _archive_out_dir(os.path.dirname(str(arc)), arc.stem, root_str, cfg.out_base)
+                self._handle_one_archive(arc, out_dir, cfg, st.st_size if st else -1)
+                done += 1; self.emit('progress', done, total)
+                self.emit('phase', "完成")
 
         finally:
             self.post("任务结束。")
         self.after(0, self._finish_run, self.stop_flag.is_set())
 
-    # 处理单个压缩包（解压）
-    def _handle_one_archive(self, arc: Path, root_for_rel: Path):
-        sig = sniff_signature(arc)
-        if sig in ('html', 'xml', 'pdf'):
-            self.post(f"⚠ 不是压缩包（检测到 {sig.upper()} 头），可能下载的是网页/占位文件：{arc}")
-            return
-
-        password = infer_password(arc)
-
-        out_base = Path(self.var_out.get().strip('" ')) if self.var_out.get().strip() else arc.parent
-        if self.var_out.get().strip():
-            try:
-                rel = arc.parent.relative_to(root_for_rel) if root_for_rel in arc.parents else Path('')
-                out_dir = out_base / rel / (arc.stem)
-            except Exception:
-                out_dir = out_base / (arc.stem)
-        else:
-            out_dir = arc.parent / (arc.stem)
-        out_dir.mkdir(parents=True, exist_ok=True)
-
+    def _resolve_tools(self) -> Tuple[Optional[Tuple[str, str]], Optional[Tuple[str, str]], Optional[Path]]:
+        """每次运行解析一次解压程序与输出目录：返回 (first, second, out_base)；out_base 为 None 表示解压到压缩包旁。"""
         bz = self.var_bz.get().strip('" ')
         sz = self.var_7z.get().strip('" ')
-        policy = self.var_policy.get()
-        quiet = max(10, int(self.var_quiet.get() or 30))
+        out = self.var_out.get().strip('" ')
+        out_base = Path(out) if out.strip() else None
 
         first = None; second = None
         if bz and Path(bz).is_file():
@@ -782,8 +1295,8 @@ class AutoExtractorApp(tk.Tk):
                 second = ('7zip', sz)
 
         if first is None and second is None:
-            bz_auto = find_on_path(['bz.exe'])
-            sz_auto = find_on_path(['7z.exe'])
+            bz_auto = find_on_path(('bz.exe',))
+            sz_auto = find_on_path(('7z.exe',))
             if bz_auto:
                 first = ('bandizip', bz_auto)
                 self.post(f"[提示] 已自动找到 Bandizip：{bz_auto}")
@@ -792,39 +1305,93 @@ class AutoExtractorApp(tk.Tk):
                 self.post(f"[提示] 已自动找到 7-Zip：{sz_auto}")
             elif sz_auto:
                 second = ('7zip', sz_auto)
+        return first, second, out_base
+
+    def _run_config(self) -> RunConfig:
+        first, second, out_base = self._resolve_tools()
+        cross_try = self.var_cross_try.get()
+        # 预测试只有在能切换到第二个解压器时才影响结果（失败仍会照常解压），
+        # 否则等于把整个压缩包多解一遍，直接以解压的返回码为准
+        pretest = self.var_pretest.get() and cross_try and second is not None
+        workers = self._scan_workers()
+        return RunConfig(
+            out_base=out_base,
+            policy=self.var_policy.get(),
+            quiet=max(10, int(self.var_quiet.get() or 30)),
+            nested=self.var_nested.get(),
+            delete=self.var_delete.get(),
+            cross_try=cross_try,
+            pretest=pretest,
+            first=first,
+            second=second,
+            workers=workers,
+            recursive=self.var_recursive.get(),
+            slots=threading.BoundedSemaphore(workers),
+        )
+
+    def _ensure_dir(self, p: Path):
+        key = str(p)
+        if key not in self._mkdir_cache:
+            p.mkdir(parents=True, exist_ok=True)
+            self._mkdir_cache.add(key)
+
+    # 处理单个压缩包（解压）
+    def _handle_one_archive(self, arc: Path, out_dir: Path, cfg: RunConfig, size: int = -1):
+        """整个处理过程占用 cfg.slots 的一个名额；二次解压期间由 _extract_nested 临时让出。"""
+        with cfg.slots:
+            self._process_archive(arc, out_dir, cfg, size)
+
+    def _process_archive(self, arc: Path, out_dir: Path, cfg: RunConfig, size: int):
+        # 扩展名已表明是压缩包且文件不算小时，跳过读文件头；size 未知（-1）时照常识别
+        if size >= SNIFF_SUSPECT_BYTES and arc.name.lower().endswith(ARCHIVE_EXTS):
+            sig = 'unknown'
+        else:
+            sig = sniff_signature(arc)
+            if sig in ('html', 'xml', 'pdf'):
+                self.post(f"⚠ 不是压缩包（检测到 {sig.upper()} 头），可能下载的是网页/占位文件：{arc}")
+                return
+
+        password = infer_password(arc)
+
+        self._ensure_dir(out_dir)
+
+        first, second = cfg.first, cfg.second
+        policy, quiet = cfg.policy, cfg.quiet
 
         if first is None:
             self.post(f"!! 未找到解压程序，跳过：{arc}")
             return
 
+        job = ArchiveJob(arc, out_dir, password)
+
         # 测试
-        if self.var_pretest.get():
-            self.after(0, self._set_phase, "测试")
-            tester = self._test_archive(first, arc, password, quiet)
-            if tester is False and self.var_cross_try.get() and second:
+        if cfg.pretest:
+            self.emit('phase', "测试")
+            tester = self._test_archive(first, job, quiet)
+            if tester is False and cfg.cross_try and second:
                 self.post("  ↺ 测试失败，切换另一个解压器再测...")
-                self.after(0, self._set_phase, "测试（切换）")
-                if self._test_archive(second, arc, password, quiet) is False:
+                self.emit('phase', "测试（切换）")
+                if self._test_archive(second, job, quiet) is False:
                     self.post("✖ 归类为不可用/损坏或分卷缺失，已跳过（可尝试重新下载/补齐分卷/修复）")
                     return
 
         # 解压
-        self.after(0, self._set_phase, "解压")
-        ok = self._extract_with(first, arc, out_dir, password, policy, quiet)
-        if not ok and self.var_cross_try.get() and second:
+        self.emit('phase', "解压")
+        ok = self._extract_with(first, job, policy, quiet)
+        if not ok and cfg.cross_try and second:
             self.post("  ↺ 失败，切换另一个解压器重试...")
-            self.after(0, self._set_phase, "解压（切换）")
-            ok = self._extract_with(second, arc, out_dir, password, policy, quiet)
+            self.emit('phase', "解压（切换）")
+            ok = self._extract_with(second, job, policy, quiet)
 
         if ok:
-            if self.var_nested.get():
-                nested = self._extract_nested(out_dir, password, policy,
+            if cfg.nested:
+                nested = self._extract_nested(out_dir, password, cfg,
                                               first[0] if ok else '7zip',
                                               first[1] if first and first[0]=='bandizip' else '',
                                               second[1] if second and second[0]=='7zip' else (first[1] if first and first[0]=='7zip' else ''))
                 if nested:
                     self.post(f"  ✔ 二次解压完成（{nested} 个）")
-            if self.var_delete.get():
+            if cfg.delete:
                 removed = 0
                 for p in get_all_multipart_siblings(arc):
                     try: p.unlink(missing_ok=True); removed += 1
@@ -840,48 +1407,84 @@ class AutoExtractorApp(tk.Tk):
         if not root.is_dir():
             messagebox.showerror("错误", "请先选择有效的扫描根目录")
             return
+        self._clear_tree()
+        self.rows_by_iid.clear()
+        found = gather_archives_stat(root, self.var_recursive.get(), workers=self._scan_workers())
+        paths = [p for p, _ in found]
+        # (路径, mtime, 大小) 作缓存键：重复扫描时未变动的文件不再读盘
+        keys = [(str(p), st.st_mtime_ns, st.st_size) if st else (str(p), 0, 0)
+                for p, st in found]
+        # 逐文件的识别/推断全部放进线程池，工作线程只产出 dict；
+        # map 保持扫描顺序，池结束后再在主线程统一填表
+        with ThreadPoolExecutor(max_workers=SNIFF_WORKERS, thread_name_prefix="scanrow") as ex:
+            rows = list(ex.map(_build_scan_row, paths, keys))
+        for row in rows:
+            self.rows_by_iid[str(row['path'])] = row
+        self._reload_tree(rows)
+        self._refresh_list_count()
+
+    @contextmanager
+    def _tree_batch(self):
+        """批量修改表格期间暂时隐藏所有列，避免逐行重算布局。"""
+        cols = self.tree['displaycolumns']
+        self.tree.configure(displaycolumns=())
+        try:
+            yield
+        finally:
+            self.tree.configure(displaycolumns=cols)
+
+    def _clear_tree(self):
+        # get_children 不含被过滤 detach 的行，需一并删除
         self.tree.delete(*self.tree.get_children())
-        self.scan_rows.clear(); self.bytes_map.clear(); self.checked_map.clear(); self.favorite_map.clear()
-        paths = gather_archives(root, self.var_recursive.get())
-        for p in paths:
-            sig = sniff_signature(p)
-            szb = file_size(p)
-            row = {
-                'path': p, 'name': p.name, 'sizeb': szb, 'sizes': human(szb),
-                'type': sig, 'dir': str(p.parent), 'pwd': infer_password(p) or "",
-                'checked': False, 'fav': False
-            }
-            self.scan_rows.append(row); self.bytes_map[str(p)] = szb
-        self._reload_tree(self.scan_rows)
-        self.lbl_t2_count.config(text=f"已列出：{len(self.scan_rows)}")
+        if self.detached_iids:
+            self.tree.delete(*self.detached_iids)
+            self.detached_iids.clear()
+        self.values_map.clear()
+        self.selected_iids.clear()
+
+    def _show_rows(self, rows: List[Dict]):
+        """过滤显示：行始终留在表格里，只 detach 不显示的行、按顺序 reattach 显示的行。"""
+        visible = [str(r['path']) for r in rows]
+        keep = set(visible)
+        hidden = [iid for iid in self.rows_by_iid if iid not in keep]
+        with self._tree_batch():
+            if hidden:
+                # 被过滤掉的行同时取消选中，右键菜单不会作用到看不见的行
+                self.tree.selection_remove(*hidden)
+                self.tree.detach(*hidden)
+            for idx, iid in enumerate(visible):
+                self.tree.reattach(iid, '', idx)
+        self.detached_iids = set(hidden)
+        self.selected_iids -= self.detached_iids
 
     def _reload_tree(self, rows: List[Dict]):
-        self.tree.delete(*self.tree.get_children())
-        for r in rows:
-            iid = str(r['path'])
-            checked = bool(r.get('checked'))
-            fav = bool(r.get('fav'))
-            self.tree.insert('', 'end', iid=iid, values=(
-                '✓' if checked else '',
-                '★' if fav else '',
-                r['name'], r['sizes'], r['type'], r['dir'], r['pwd']
-            ))
-            self.checked_map[iid] = checked
-            self.favorite_map[iid] = fav
+        self._clear_tree()
+        insert = self.tree.insert
+        with self._tree_batch():
+            for r in rows:
+                iid = str(r['path'])
+                vals = ['✓' if r.get('checked') else '', '★' if r.get('fav') else '',
+                        r['name'], r['sizes'], r['type'], r['dir'], r['pwd']]
+                insert('', 'end', iid=iid, values=vals)
+                self.values_map[iid] = vals
+
+    def _set_cell(self, iid: str, idx: int, val: str):
+        """改一个单元格：values 取自 values_map，只需一次写入，不回读表格。"""
+        vals = self.values_map[iid]
+        vals[idx] = val
+        self.tree.item(iid, values=vals)
+
+    def _row_flag(self, iid: str, key: str) -> bool:
+        r = self.rows_by_iid.get(iid)
+        return bool(r and r.get(key))
 
     def _set_checked(self, iid: str, flag: bool):
-        self.checked_map[iid] = flag
         self._update_scan_row_state(iid, 'checked', flag)
-        vals = list(self.tree.item(iid, 'values'))
-        vals[0] = '✓' if flag else ''
-        self.tree.item(iid, values=vals)
+        self._set_cell(iid, 0, '✓' if flag else '')
 
     def _set_favorite(self, iid: str, flag: bool):
-        self.favorite_map[iid] = flag
         self._update_scan_row_state(iid, 'fav', flag)
-        vals = list(self.tree.item(iid, 'values'))
-        vals[1] = '★' if flag else ''
-        self.tree.item(iid, values=vals)
+        self._set_cell(iid, 1, '★' if flag else '')
 
     def _on_tree_click(self, event):
         row = self.tree.identify_row(event.y)
@@ -891,13 +1494,19 @@ class AutoExtractorApp(tk.Tk):
         if not row or col not in ('#1', '#2'):
             return
         if col == '#1':
-            self._set_checked(row, not self.checked_map.get(row, False))
+            self._set_checked(row, not self._row_flag(row, 'checked'))
         elif col == '#2':
-            self._set_favorite(row, not self.favorite_map.get(row, False))
+            self._set_favorite(row, not self._row_flag(row, 'fav'))
         return "break"
 
+    def _on_tree_select(self, event=None):
+        self.selected_iids = set(self.tree.selection())
+
     def _ctx_selected_iids(self) -> List[str]:
-        sel = list(self.tree.selection())
+        # 只取当前可见的行：删除/复制等操作绝不能落到被过滤隐藏的行上；
+        # 按 rows_by_iid 的顺序（即表格排序）返回，结果与日志顺序稳定
+        picked = self.selected_iids - self.detached_iids
+        sel = [iid for iid in self.rows_by_iid if iid in picked] if picked else []
         if not sel and self.ctx_iid:
             sel = [self.ctx_iid]
         return sel
@@ -909,8 +1518,9 @@ class AutoExtractorApp(tk.Tk):
             self.last_cell = {'iid': row, 'col': col}
         if row:
             # 如果未选中则追加选中，已选则保留原有多选
-            if row not in self.tree.selection():
+            if row not in self.selected_iids:
                 self.tree.selection_add(row)
+                self.selected_iids.add(row)  # 不等虚拟事件，菜单命令马上能用到
             self.ctx_iid = row
         else:
             self.ctx_iid = None
@@ -932,8 +1542,7 @@ class AutoExtractorApp(tk.Tk):
         if not bbox:
             return
         x, y, w, h = bbox
-        vals = list(self.tree.item(row, 'values'))
-        old = vals[6]
+        old = self.values_map[row][6]
         entry = ttk.Entry(self.tree)
         entry.insert(0, old)
         entry.place(x=x, y=y, width=w, height=h)
@@ -942,8 +1551,7 @@ class AutoExtractorApp(tk.Tk):
         def save_edit(event=None):
             new_val = entry.get()
             entry.destroy()
-            vals[6] = new_val
-            self.tree.item(row, values=vals)
+            self._set_cell(row, 6, new_val)
             self._update_scan_row_state(row, 'pwd', new_val)
 
         entry.bind("<Return>", save_edit)
@@ -953,7 +1561,7 @@ class AutoExtractorApp(tk.Tk):
         cell = self.last_cell
         if not cell or not cell.get('iid'):
             return
-        vals = self.tree.item(cell['iid'], 'values')
+        vals = self.values_map.get(cell['iid'], ())
         try:
             idx = int(cell['col'].lstrip('#')) - 1
         except Exception:
@@ -973,7 +1581,7 @@ class AutoExtractorApp(tk.Tk):
         iids = self._ctx_selected_iids()
         if not iids:
             return
-        target_flag = not all(self.checked_map.get(i, False) for i in iids)
+        target_flag = not all(self._row_flag(i, 'checked') for i in iids)
         for iid in iids:
             self._set_checked(iid, target_flag)
 
@@ -981,7 +1589,7 @@ class AutoExtractorApp(tk.Tk):
         iids = self._ctx_selected_iids()
         if not iids:
             return
-        target_flag = not all(self.favorite_map.get(i, False) for i in iids)
+        target_flag = not all(self._row_flag(i, 'fav') for i in iids)
         for iid in iids:
             self._set_favorite(iid, target_flag)
 
@@ -991,9 +1599,9 @@ class AutoExtractorApp(tk.Tk):
             return
         dirs = set()
         for iid in iids:
-            vals = self.tree.item(iid, 'values')
-            if len(vals) >= 6:
-                dirs.add(vals[5])
+            r = self.rows_by_iid.get(iid)
+            if r is not None:
+                dirs.add(r['dir'])
         for d in dirs:
             try:
                 if os.name == 'nt':
@@ -1005,10 +1613,10 @@ class AutoExtractorApp(tk.Tk):
 
     def _remove_row(self, iid: str):
         self.tree.delete(iid)
-        self.checked_map.pop(iid, None)
-        self.favorite_map.pop(iid, None)
-        self.bytes_map.pop(iid, None)
-        self.scan_rows = [r for r in self.scan_rows if str(r.get('path')) != iid]
+        self.detached_iids.discard(iid)
+        self.selected_iids.discard(iid)
+        self.values_map.pop(iid, None)
+        self.rows_by_iid.pop(iid, None)
 
     def _ctx_delete_files(self):
         iids = self._ctx_selected_iids()
@@ -1024,7 +1632,7 @@ class AutoExtractorApp(tk.Tk):
             except Exception as e:
                 self.post(f"!! 删除失败：{iid} ({e})")
             self._remove_row(iid)
-        self.lbl_t2_count.config(text=f"已列出：{len(self.scan_rows)}")
+        self._refresh_list_count()
         self.post(f"已删除并移除 {removed} 个文件")
 
     def _ctx_remove_items(self):
@@ -1033,7 +1641,7 @@ class AutoExtractorApp(tk.Tk):
             return
         for iid in iids:
             self._remove_row(iid)
-        self.lbl_t2_count.config(text=f"已列出：{len(self.scan_rows)}")
+        self._refresh_list_count()
         self.post(f"已从列表移除 {len(iids)} 条记录（未删除文件）")
 
     def _ctx_copy_to_dir(self):
@@ -1054,7 +1662,7 @@ class AutoExtractorApp(tk.Tk):
             try:
                 if dst.exists():
                     dst = target_path / f"{src.stem}_copy{src.suffix}"
-                shutil.copy2(src, dst)
+                _fast_copy(src, dst)
                 copied += 1
             except Exception as e:
                 self.post(f"!! 复制失败：{src} -> {dst} ({e})")
@@ -1067,11 +1675,10 @@ class AutoExtractorApp(tk.Tk):
         new_pwd = simpledialog.askstring("更正密码", "输入新的解压密码（留空则清除）：", parent=self)
         if new_pwd is None:
             return
-        for iid in iids:
-            self._update_scan_row_state(iid, 'pwd', new_pwd)
-            vals = list(self.tree.item(iid, 'values'))
-            vals[6] = new_pwd
-            self.tree.item(iid, values=vals)
+        with self._tree_batch():
+            for iid in iids:
+                self._update_scan_row_state(iid, 'pwd', new_pwd)
+                self._set_cell(iid, 6, new_pwd)
         self.post(f"已更新 {len(iids)} 条记录的密码")
 
     def apply_filter(self):
@@ -1093,9 +1700,8 @@ class AutoExtractorApp(tk.Tk):
             return
 
         filt = []
-        for r in self.scan_rows:
-            blob = f"{r['name']} {r['dir']} {r['pwd']}".lower()
-            if kw and kw not in blob:
+        for r in self.rows_by_iid.values():
+            if kw and kw not in r['_blob']:
                 continue
             sz = r.get('sizeb', 0)
             if min_b is not None and sz < min_b:
@@ -1103,9 +1709,9 @@ class AutoExtractorApp(tk.Tk):
             if max_b is not None and sz > max_b:
                 continue
             filt.append(r)
-        self._reload_tree(filt)
+        self._show_rows(filt)
         tag = "（过滤后）" if kw or min_b is not None or max_b is not None else ""
-        self.lbl_t2_count.config(text=f"已列出：{len(filt)} {tag}")
+        self._refresh_list_count(len(filt), f" {tag}" if tag else "")
 
     def export_scan_list(self):
         """导出当前列表或选中项为 Excel（尊重过滤结果）"""
@@ -1126,7 +1732,7 @@ class AutoExtractorApp(tk.Tk):
             ws = wb.active
             ws.append(["勾选", "收藏", "文件名", "大小", "类型", "所在目录", "推断密码"])
             for iid in items:
-                vals = self.tree.item(iid, 'values')
+                vals = self.values_map[iid]
                 ws.append([vals[0], vals[1], vals[2], vals[3], vals[4], vals[5], vals[6]])
             wb.save(path)
             messagebox.showinfo("完成", f"已导出 {len(items)} 条记录到：\n{path}")
@@ -1136,60 +1742,49 @@ class AutoExtractorApp(tk.Tk):
             messagebox.showerror("错误", f"导出失败：{e}")
 
     def sort_by(self, col: str):
-        items = list(self.tree.get_children(''))
-        def keyfunc(iid):
-            vals = self.tree.item(iid, 'values')
-            if col == 'sel':
-                return (self.checked_map.get(iid, False),)
-            if col == 'fav':
-                return (self.favorite_map.get(iid, False),)
-            if col == 'name':
-                return (vals[2].lower(),)
-            elif col == 'size':
-                return (self.bytes_map.get(iid, 0),)
-            elif col == 'type':
-                return (vals[4].lower(),)
-            elif col == 'dir':
-                return (vals[5].lower(),)
-            elif col == 'pwd':
-                return (vals[6].lower(),)
-            return (vals[2].lower(),)
         if hasattr(self, 'sort_state') and self.sort_state.get('col') == col:
             self.sort_state['desc'] = not self.sort_state['desc']
         else:
             self.sort_state = {'col': col, 'desc': False}
-        items.sort(key=keyfunc, reverse=self.sort_state['desc'])
-        for idx, iid in enumerate(items):
-            self.tree.move(iid, '', idx)
+        # 直接按行数据排序，不再逐行从表格回读；排序结果同时作为后续过滤的显示顺序
+        rows = sorted(self.rows_by_iid.values(), key=SORT_KEYS.get(col, SORT_KEYS['name']),
+                      reverse=self.sort_state['desc'])
+        self.rows_by_iid = {str(r['path']): r for r in rows}
+        visible = [iid for iid in self.rows_by_iid if iid not in self.detached_iids]
+        with self._tree_batch():
+            for idx, iid in enumerate(visible):
+                self.tree.move(iid, '', idx)
 
     def _t2_select_all(self, flag: bool):
         if flag:
             self.tree.selection_set(self.tree.get_children())
         else:
             self.tree.selection_remove(self.tree.get_children())
-        for iid in self.tree.get_children():
-            self.checked_map[iid] = flag
-            self._update_scan_row_state(iid, 'checked', flag)
-            vals = list(self.tree.item(iid, 'values'))
-            vals[0] = '✓' if flag else ''
-            self.tree.item(iid, values=vals)
+        mark = '✓' if flag else ''
+        with self._tree_batch():
+            for iid in self.tree.get_children():
+                self._update_scan_row_state(iid, 'checked', flag)
+                self._set_cell(iid, 0, mark)
 
     def _update_scan_row_state(self, iid: str, key: str, val):
-        for r in self.scan_rows:
-            if str(r.get('path')) == iid:
-                r[key] = val
-                break
+        r = self.rows_by_iid.get(iid)
+        if r is not None:
+            r[key] = val
+            if key == 'pwd':
+                r['_blob'] = _filter_blob(r)
 
     def on_extract_selected(self):
-        checked = [iid for iid, v in self.checked_map.items() if v]
+        checked = [iid for iid, r in self.rows_by_iid.items() if r.get('checked')]
         sel = checked or list(self.tree.selection())
         if not sel:
             messagebox.showinfo("提示", "请先勾选或选择要解压的项（支持多选）。")
             return
-        workers = max(1, min(int(self.var_workers.get() or 1), 16))
         total = len(sel)
         self.stop_flag.clear()
+        self._mkdir_cache.clear()
         self.txt.delete('1.0', 'end')
+        cfg = self._run_config()
+        workers = cfg.workers
         self.progress['value'] = 0
         self.progress['maximum'] = total
         self.lbl_stat.config(text=f"准备中...（并发 {workers}）")
@@ -1197,30 +1792,39 @@ class AutoExtractorApp(tk.Tk):
         done_lock = threading.Lock()
         done_cnt = {'n': 0}
 
-        def task(iid: str):
+        root = Path(self.var_root.get().strip('" '))
+        root_str = _root_key(root) if root.is_dir() else None
+        # 输出目录在入队时就用行里缓存的目录/主名算好，工作线程不再解析路径
+        jobs = []
+        for iid in sel:
+            r = self.rows_by_iid.get(iid)
+            parent, stem = (r['dir'], r['stem']) if r else (os.path.dirname(iid), Path(iid).stem)
+            jobs.append((iid, _archive_out_dir(parent, stem, root_str, cfg.out_base)))
+
+        def run_one(iid: str, out_dir: Path):
             if self.stop_flag.is_set():
                 return
             arc = Path(iid)
-            root = Path(self.var_root.get().strip('" '))
-            if not arc.exists():
+            try:
+                size = os.stat(iid).st_size
+            except OSError:
                 self.post(f"⚠ 找不到文件，跳过：{arc}")
             else:
-                root_for_rel = root if root.is_dir() else arc.parent
-                self._handle_one_archive(arc, root_for_rel)
+                self._handle_one_archive(arc, out_dir, cfg, size)
             with done_lock:
                 done_cnt['n'] += 1
-                n = done_cnt['n']
-            self.after(0, self._update_progress, n, total)
+                # 在锁内上报，保证队列里的进度单调递增
+                self.emit('progress', done_cnt['n'], total)
 
         def worker_selected():
             try:
-                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as ex:
-                    futures = [ex.submit(task, iid) for iid in sel]
-                    for _ in as_completed(futures):
-                        if self.stop_flag.is_set():
-                            for f in futures:
-                                f.cancel()
-                            break
+                futures = [self._extract_pool.submit(run_one, iid, out_dir) for iid, out_dir in jobs]
+                for _ in as_completed(futures):
+                    if self.stop_flag.is_set():
+                        for f in futures:
+                            f.cancel()
+                        break
+                wait(futures)
             finally:
                 self.post("所选项处理完成。")
                 self.after(0, self._finish_run, self.stop_flag.is_set())
@@ -1229,13 +1833,13 @@ class AutoExtractorApp(tk.Tk):
 
     # ---------- 解压子流程 ----------
 
-    def _test_archive(self, tool_pair, arc: Path, pwd: Optional[str], quiet: int) -> Optional[bool]:
+    def _test_archive(self, tool_pair, job: ArchiveJob, quiet: int) -> Optional[bool]:
         name, exe = tool_pair
         if name == 'bandizip':
-            cmd = bandizip_test_cmd(exe, arc, pwd)
+            cmd = bandizip_test_cmd(exe, job)
         else:
-            cmd = sevenzip_test_cmd(exe, arc, pwd)
-        self.post(f"→ 测试：{arc}  使用：{name}")
+            cmd = sevenzip_test_cmd(exe, job)
+        self.post(f"→ 测试：{job.path_str}  使用：{name}")
         rc = run_cmd(cmd, self.post, self.stop_flag, monitor_dir=None, quiet_limit=quiet, phase_name="测试")
         if rc == 0:
             self.post("  ✔ 测试通过")
@@ -1244,48 +1848,94 @@ class AutoExtractorApp(tk.Tk):
             return None
         return False
 
-    def _extract_with(self, tool_pair, arc: Path, out_dir: Path, pwd: Optional[str], policy: str, quiet: int) -> bool:
+    def _extract_with(self, tool_pair, job: ArchiveJob, policy: str, quiet: int) -> bool:
         name, exe = tool_pair
         if name == 'bandizip':
-            cmd = bandizip_cmd(exe, arc, out_dir, pwd, policy)
+            cmd = bandizip_cmd(exe, job, policy)
         else:
-            cmd = sevenzip_cmd(exe, arc, out_dir, pwd, policy)
-        self.post(f"→ 解压：{arc}  使用：{name}  输出：{out_dir}  策略：{policy}")
-        rc = run_cmd(cmd, self.post, self.stop_flag, monitor_dir=out_dir, quiet_limit=quiet, phase_name="解压")
+            cmd = sevenzip_cmd(exe, job, policy)
+        self.post(f"→ 解压：{job.path_str}  使用：{name}  输出：{job.outdir_str}  策略：{policy}")
+        rc = run_cmd(cmd, self.post, self.stop_flag, monitor_dir=job.outdir, quiet_limit=quiet, phase_name="解压")
         return rc == 0
 
-    def _extract_nested(self, root: Path, password: str, policy: str, exe_name: str, bz: str, sz: str) -> int:
-        count = 0
-        for dirpath, _, files in os.walk(root):
+    def _extract_nested(self, root: Path, password: str, cfg: RunConfig, exe_name: str, bz: str, sz: str) -> int:
+        """
+        逐层展开压缩包里的压缩包：每层先收集 (压缩包, 输出目录, 命令)，再按并发数并行执行；
+        解压成功的输出目录进入下一层，只扫描新产生的目录，已处理的压缩包不再重复解压。
+        只在 _handle_one_archive 持有 cfg.slots 名额期间（经 _process_archive）调用：展开时先让出该名额，
+        每个二次解压进程各自占名额，结束后再取回；
+        输出到同一目录的压缩包依次执行，互不覆盖。
+        """
+        policy = cfg.policy
+        # 解压程序在循环内不变，只检查一次；都不可用就不必遍历
+        use_bz = exe_name == 'bandizip' and bz and Path(bz).is_file()
+        use_sz = not use_bz and sz and Path(sz).is_file()
+        if not (use_bz or use_sz):
+            return 0
+
+        def run_one(t) -> bool:
+            arc, out_dir, cmd = t
             if self.stop_flag.is_set():
-                break
-            for f in files:
-                if self.stop_flag.is_set():
+                return False
+            with cfg.slots:
+                rc = run_cmd(cmd, self.post, self.stop_flag, monitor_dir=out_dir, quiet_limit=cfg.quiet, phase_name="二次解压")
+            if rc != 0:
+                return False
+            if cfg.delete:
+                for p in get_all_multipart_siblings(arc):
+                    try: p.unlink(missing_ok=True)
+                    except: pass
+            return True
+
+        def run_group(group) -> List[bool]:
+            # 同一输出目录的压缩包依次解压，避免并行写进同一目录
+            return [run_one(t) for t in group]
+
+        pending = deque([root])
+        seen_dirs, seen_arcs = set(), set()
+        count = 0
+        cfg.slots.release()
+        try:
+            for _ in range(NESTED_MAX_DEPTH):
+                if not pending or self.stop_flag.is_set():
                     break
-                arc = Path(dirpath) / f
-                arc = normalize_extension(arc)
-                low = arc.name.lower()
-                if any([low.endswith('.zip'), low.endswith('.7z'), low.endswith('.rar'),
-                        low.endswith('.001'), low.endswith('.z01'),
-                        re.search(r'\.part\d+\.rar$', low) is not None]):
-                    is_multi, is_first = is_multipart_first(arc)
-                    if is_multi and not is_first:
+                groups: Dict[str, list] = {}
+                while pending:
+                    d = pending.popleft()
+                    key = os.path.normcase(os.path.abspath(d))
+                    if key in seen_dirs:
                         continue
-                    out_dir = arc.parent / (arc.stem)
-                    out_dir.mkdir(parents=True, exist_ok=True)
-                    if exe_name == 'bandizip' and bz and Path(bz).is_file():
-                        cmd = bandizip_cmd(bz, arc, out_dir, password, policy)
-                    elif sz and Path(sz).is_file():
-                        cmd = sevenzip_cmd(sz, arc, out_dir, password, policy)
-                    else:
-                        continue
-                    rc = run_cmd(cmd, self.post, self.stop_flag, monitor_dir=out_dir, quiet_limit=max(10, int(self.var_quiet.get() or 30)), phase_name="二次解压")
-                    if rc == 0:
-                        count += 1
-                        if self.var_delete.get():
-                            for p in get_all_multipart_siblings(arc):
-                                try: p.unlink(missing_ok=True)
-                                except: pass
+                    seen_dirs.add(key)
+                    for e in _iter_archive_entries(d):
+                        if self.stop_flag.is_set():
+                            break
+                        path = _accepted_archive_path(e)
+                        if path is None or os.path.normcase(path) in seen_arcs:
+                            continue
+                        seen_arcs.add(os.path.normcase(path))
+                        arc = Path(path)
+                        out_dir = arc.parent / (arc.stem)
+                        self._ensure_dir(out_dir)
+                        job = ArchiveJob(arc, out_dir, password)
+                        cmd = bandizip_cmd(bz, job, policy) if use_bz else sevenzip_cmd(sz, job, policy)
+                        groups.setdefault(os.path.normcase(job.outdir_str), []).append((arc, out_dir, cmd))
+                if not groups:
+                    break
+                group_list = list(groups.values())
+                # 外层任务跑在共享线程池里，这里另开小线程池，避免在同一线程池内互相等待；
+                # 实际同时运行的解压进程数由 cfg.slots 限制
+                if cfg.workers > 1 and len(group_list) > 1:
+                    with ThreadPoolExecutor(max_workers=min(cfg.workers, len(group_list)), thread_name_prefix="nested") as ex:
+                        results = list(ex.map(run_group, group_list))
+                else:
+                    results = [run_group(g) for g in group_list]
+                for group, oks in zip(group_list, results):
+                    for (_, out_dir, _), ok in zip(group, oks):
+                        if ok:
+                            count += 1
+                            pending.append(out_dir)
+        finally:
+            cfg.slots.acquire()
         return count
 
     # ---------- 完成后动作 ----------